@@ -1,17 +1,24 @@
 import asyncio
+import contextlib
 import random
 import re
+import sqlite3
 from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
 from datetime import datetime, timezone
+from itertools import islice
 
 import discord
 from discord import app_commands
 
 from bot.config import DISCORD_TOKEN, FAQ_CHANNEL_ID, RULEBOOK_REFRESH_HOURS, log
-from bot.claude_client import ask_rulebook, refresh_rulebook
+from bot.chunking import stream_chunks
+from bot.claude_client import close_clients, refresh_rulebook, stream_rulebook
+from bot.state import BotState
 
 MAX_RESPONSE_LENGTH = 1900
 MAX_RECENT_QUESTIONS = 50
+EMPTY_ANSWER_MESSAGE = "Sorry, I couldn't come up with an answer to that. Try rephrasing your question."
 
 
 class BeerFAQBot(discord.Client):
@@ -21,8 +28,14 @@ class BeerFAQBot(discord.Client):
         intents.members = True
         super().__init__(intents=intents)
         self.tree = app_commands.CommandTree(self)
-        self.faq_channel_id: int | None = FAQ_CHANNEL_ID
-        self.recent_questions: deque[dict] = deque(maxlen=MAX_RECENT_QUESTIONS)
+        self.state = BotState(max_questions=MAX_RECENT_QUESTIONS)
+        self.faq_channel_id: int | None = self.state.get_faq_channel_id() or FAQ_CHANNEL_ID
+        self.recent_questions: deque[dict] = deque(
+            self.state.recent_questions(MAX_RECENT_QUESTIONS), maxlen=MAX_RECENT_QUESTIONS
+        )
+        self._refresh_task: asyncio.Task | None = None
+        # Matches both <@id> and <@!id> mentions of the bot; built once the user ID is known.
+        self._mention_re: re.Pattern[str] | None = None
 
     _HANDSOME_RE = re.compile(r"handsome.*commi?ss?ioner|commi?ss?ioner.*handsome", re.IGNORECASE)
 
@@ -37,20 +50,42 @@ class BeerFAQBot(discord.Client):
         return f"That's an easy one. It's obviously {winner.mention}. No contest."
 
     def _log_question(self, user: str, question: str) -> None:
-        """Log a question and store it in the recent questions buffer."""
+        """Log a question and store it in the recent questions buffer and state database."""
         log.info("Question from %s: %s", user, question)
+        now = datetime.now(timezone.utc)
         self.recent_questions.append({
             "user": user,
             "question": question,
-            "time": datetime.now(timezone.utc),
+            "time": now,
         })
+        # Persisting the log is best-effort; a database error must never block the answer.
+        try:
+            self.state.add_question(user, question, now)
+        except sqlite3.Error:
+            log.exception("Failed to save question to state database")
 
     async def setup_hook(self) -> None:
+        # Swap the bundled rulebook for the live Google Doc before taking questions.
+        await refresh_rulebook()
         self.tree.add_command(self._make_ask_command())
         self.tree.add_command(self._make_setchannel_command())
         self.tree.add_command(self._make_recent_command())
         await self.tree.sync()
         log.info("Slash commands synced")
+        # Started here rather than in on_ready, which fires again on every reconnect.
+        if RULEBOOK_REFRESH_HOURS > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_rulebook_loop())
+
+    async def close(self) -> None:
+        # Stop any in-progress refresh before its HTTP client is closed underneath it.
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+        await super().close()
+        await close_clients()
+        self.state.close()
 
     def _make_ask_command(self) -> app_commands.Command:
         bot = self
@@ -83,23 +118,21 @@ class BeerFAQBot(discord.Client):
                 await interaction.followup.send(f"**Q:** {question}\n\n{easter_egg}")
                 return
 
+            header = f"**Q:** {question}\n\n"
+
+            async def send(index: int, chunk: str) -> None:
+                if index == 0:
+                    await interaction.followup.send(header + chunk)
+                else:
+                    await interaction.channel.send(chunk)
+
             try:
-                answer = await ask_rulebook(question)
+                await _send_in_order(_answer_chunks(question), send)
             except Exception:
                 log.exception("Claude API error")
                 await interaction.followup.send(
                     "Sorry, I ran into an error. Try again in a moment."
                 )
-                return
-
-            header = f"**Q:** {question}\n\n"
-            chunks = _split_message(answer)
-            chunks[0] = header + chunks[0]
-            for i, chunk in enumerate(chunks):
-                if i == 0:
-                    await interaction.followup.send(chunk)
-                else:
-                    await interaction.channel.send(chunk)
 
         return ask
 
@@ -113,6 +146,7 @@ class BeerFAQBot(discord.Client):
         @app_commands.default_permissions(manage_guild=True)
         async def setchannel(interaction: discord.Interaction) -> None:
             bot.faq_channel_id = interaction.channel_id
+            bot.state.set_faq_channel_id(interaction.channel_id)
             log.info(
                 "FAQ channel set to #%s (%s) by %s",
                 interaction.channel.name if interaction.channel else "unknown",
@@ -136,21 +170,20 @@ class BeerFAQBot(discord.Client):
         @app_commands.default_permissions(manage_guild=True)
         @app_commands.describe(count="Number of recent questions to show (default 10)")
         async def recent(interaction: discord.Interaction, count: int = 10) -> None:
-            count = min(count, MAX_RECENT_QUESTIONS)
+            count = max(1, min(count, MAX_RECENT_QUESTIONS))
             if not bot.recent_questions:
                 await interaction.response.send_message(
-                    "No questions have been asked since the last restart.",
+                    "No questions have been asked yet.",
                     ephemeral=True,
                 )
                 return
 
-            entries = list(bot.recent_questions)[-count:]
-            lines = []
-            for entry in entries:
-                ts = entry["time"].strftime("%m/%d %I:%M %p")
-                lines.append(f"**{entry['user']}** ({ts} UTC)\n> {entry['question']}")
-
-            text = "\n\n".join(lines)
+            start = max(0, len(bot.recent_questions) - count)
+            text = "\n\n".join(
+                f"**{entry['user']}** ({entry['time'].strftime('%m/%d %I:%M %p')} UTC)\n"
+                f"> {entry['question']}"
+                for entry in islice(bot.recent_questions, start, None)
+            )
             if len(text) > MAX_RESPONSE_LENGTH:
                 text = text[:MAX_RESPONSE_LENGTH] + "\n\n*(truncated)*"
 
@@ -164,7 +197,6 @@ class BeerFAQBot(discord.Client):
             log.info("FAQ channel: %s", self.faq_channel_id)
         else:
             log.info("No FAQ channel set — use /setchannel in Discord")
-        self.loop.create_task(self._refresh_rulebook_loop())
 
     async def _refresh_rulebook_loop(self) -> None:
         """Periodically re-fetch the rulebook from Google Docs."""
@@ -198,7 +230,9 @@ class BeerFAQBot(discord.Client):
             )
             return
 
-        question = message.content.replace(f"<@{self.user.id}>", "").strip()
+        if self._mention_re is None:
+            self._mention_re = re.compile(rf"<@!?{self.user.id}>")
+        question = self._mention_re.sub("", message.content).strip()
         if not question:
             await message.reply(
                 "Ask me a question about the Beer League rulebook!",
@@ -215,35 +249,46 @@ class BeerFAQBot(discord.Client):
 
         async with message.channel.typing():
             try:
-                answer = await ask_rulebook(question)
+                await _send_in_order(
+                    _answer_chunks(question),
+                    lambda _, chunk: message.reply(chunk, mention_author=False),
+                )
             except Exception:
                 log.exception("Claude API error")
                 await message.reply(
                     "Sorry, I ran into an error. Try again in a moment.",
                     mention_author=False,
                 )
-                return
 
-        for chunk in _split_message(answer):
-            await message.reply(chunk, mention_author=False)
-
-
-def _split_message(text: str) -> list[str]:
-    """Split a long response into Discord-friendly chunks."""
-    if len(text) <= MAX_RESPONSE_LENGTH:
-        return [text]
-
-    chunks: list[str] = []
-    while text:
-        if len(text) <= MAX_RESPONSE_LENGTH:
-            chunks.append(text)
-            break
-        split_at = text.rfind("\n", 0, MAX_RESPONSE_LENGTH)
-        if split_at == -1:
-            split_at = MAX_RESPONSE_LENGTH
-        chunks.append(text[:split_at])
-        text = text[split_at:].lstrip("\n")
-    return chunks
+
+def _answer_chunks(question: str) -> AsyncIterator[str]:
+    return stream_chunks(stream_rulebook(question), MAX_RESPONSE_LENGTH, EMPTY_ANSWER_MESSAGE)
+
+
+async def _send_in_order(
+    chunks: AsyncIterator[str], send: Callable[[int, str], Awaitable[object]]
+) -> None:
+    """Post chunks in order without making the stream wait on each Discord round trip.
+
+    Each send runs as a task chained on the previous one, so the next chunk keeps
+    generating while earlier ones are being posted. Sends are never concurrent with
+    each other since Discord doesn't guarantee ordering across parallel requests.
+    """
+    previous: asyncio.Task | None = None
+
+    async def post(index: int, chunk: str, after: asyncio.Task | None) -> None:
+        if after is not None:
+            await after
+        await send(index, chunk)
+
+    try:
+        index = 0
+        async for chunk in chunks:
+            previous = asyncio.create_task(post(index, chunk, previous))
+            index += 1
+    finally:
+        if previous is not None:
+            await previous
 
 
 def main() -> None:
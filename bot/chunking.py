@@ -0,0 +1,30 @@
+from collections.abc import AsyncIterator
+
+
+async def stream_chunks(
+    stream: AsyncIterator[str], max_length: int, empty_message: str
+) -> AsyncIterator[str]:
+    """Regroup streamed text into chunks of at most max_length, emitting each as soon as it fills.
+
+    A full buffer is cut at the last newline that fits, or hard-cut if there is none.
+    Only the newlines at the cut are dropped; everything after it is carried over as is,
+    so later text keeps its separators. Emits empty_message if the stream had no visible
+    text, so the caller always has something to send.
+    """
+    buf = ""
+    emitted = False
+    async for text in stream:
+        buf += text
+        while len(buf) > max_length:
+            cut = buf.rfind("\n", 0, max_length)
+            if cut <= 0:
+                cut = max_length
+            chunk, buf = buf[:cut], buf[cut:].lstrip("\n")
+            if chunk.strip():
+                emitted = True
+                yield chunk
+    if buf.strip():
+        emitted = True
+        yield buf
+    if not emitted:
+        yield empty_message
@@ -1,31 +1,59 @@
 import asyncio
-import functools
+import math
 import re
-import urllib.request
-import urllib.error
+from collections import Counter
+from collections.abc import AsyncIterator
 from pathlib import Path
 
 import anthropic
+import httpx
+from cachetools import TTLCache
 
-from bot.config import ANTHROPIC_API_KEY, GOOGLE_DOC_ID, log
+from bot.config import ANTHROPIC_API_KEY, GOOGLE_DOC_ID, RULEBOOK_REFRESH_HOURS, log
+from bot.matching import is_rephrasing, normalize_question, question_terms
+from bot.retrieval import SectionIndex, split_sections
 
 _RULEBOOK_PATH = Path(__file__).parent / "rulebook.txt"
 _GOOGLE_DOCS_URL = f"https://docs.google.com/document/d/{GOOGLE_DOC_ID}/export?format=txt"
+_COLLAPSE_BLANKS = re.compile(r"\n{3,}")
 _rulebook_text: str = ""
-_client: anthropic.Anthropic | None = None
+# Bumped on every rulebook swap, so answers generated against an older rulebook aren't cached.
+_rulebook_generation = 0
+# Validators from the last successful Google Docs fetch, for conditional GETs.
+_last_etag: str | None = None
+_last_modified: str | None = None
+# System prompt blocks for the current rulebook, rebuilt only when the rulebook changes.
+_system_prompt_cache: list[dict] = []
+# Rulebook sections and their terms, only populated when the rulebook is too long to send whole.
+_section_index: SectionIndex | None = None
+_client: anthropic.AsyncAnthropic | None = None
+_http = httpx.AsyncClient(
+    http2=True,
+    timeout=15,
+    follow_redirects=True,
+    headers={"User-Agent": "BeerFAQBot/1.0"},
+)
+
+# (question terms, answer) keyed by normalized question. Cleared whenever the rulebook changes.
+_answer_cache: TTLCache[str, tuple[Counter[str], str]] = TTLCache(
+    maxsize=512, ttl=RULEBOOK_REFRESH_HOURS * 3600 or math.inf
+)
+
+# Pending answers keyed by normalized question, so concurrent askers share one Claude call.
+_inflight: dict[str, asyncio.Future[str]] = {}
+
+# Rulebooks up to this size (~50k tokens) are sent in full and served from the prompt cache.
+# Longer ones are split into sections and only the best matches for each question are sent.
+_FULLTEXT_MAX_CHARS = 200_000
+_SECTION_CHARS = 3000
+_TOP_SECTIONS = 5
 
 SYSTEM_PROMPT = """\
 You are the Beer League FAQ Bot. You answer questions about the Beer League Rulebook (v3.2) \
 for a League of Legends amateur competitive league.
 
-Here is the complete rulebook:
-
-<rulebook>
-{rulebook}
-</rulebook>
-
 Instructions:
-- Answer questions based ONLY on the rulebook above. If the answer is not in the rulebook, say so.
+- Answer questions based ONLY on the rulebook below. If the answer is not in the rulebook, say so.
 - Cite the relevant section number (e.g. "Section 4.4") when possible.
 - Keep answers concise but complete. Use bullet points for multi-part answers.
 - If a value is listed as "TBD" in the rulebook, say it hasn't been determined yet for this season.
@@ -33,73 +61,193 @@ Instructions:
 - If someone asks something unrelated to the Beer League, politely redirect them.
 """
 
-
-def _fetch_from_google_docs() -> str | None:
-    """Fetch the rulebook from Google Docs public export. Returns None on any error."""
+# The rulebook goes in its own system block so the static prefix can be served from
+# Anthropic's prompt cache. It's wrapped by concatenation rather than str.format so
+# building the block is a plain copy, whatever the rulebook contains.
+_PROMPT_PREFIX = "Here is the complete rulebook:\n\n<rulebook>\n"
+_EXCERPTS_PREFIX = "Here are the rulebook sections most relevant to this question:\n\n<rulebook>\n"
+_PROMPT_SUFFIX = "\n</rulebook>\n"
+
+
+async def _fetch_from_google_docs() -> str | None:
+    """Fetch the rulebook from Google Docs public export. Returns None on any error.
+
+    If the export hasn't changed since the last fetch, returns the current rulebook as is.
+    """
+    global _last_etag, _last_modified
+    headers = {}
+    if _rulebook_text:
+        if _last_etag:
+            headers["If-None-Match"] = _last_etag
+        if _last_modified:
+            headers["If-Modified-Since"] = _last_modified
     try:
-        req = urllib.request.Request(_GOOGLE_DOCS_URL, headers={"User-Agent": "BeerFAQBot/1.0"})
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            text = resp.read().decode("utf-8")
+        resp = await _http.get(_GOOGLE_DOCS_URL, headers=headers)
+        if resp.status_code == 304:
+            log.info("Google Docs rulebook not modified")
+            return _rulebook_text
+        resp.raise_for_status()
+        text = resp.content.decode("utf-8")
         # Clean up Google Docs export artifacts (extra blank lines, BOM)
-        text = text.lstrip("\ufeff")
-        text = re.sub(r"\n{3,}", "\n\n", text)
+        if text.startswith("\ufeff"):
+            text = text[1:]
+        text = _COLLAPSE_BLANKS.sub("\n\n", text)
         text = text.strip()
         if len(text) < 100:
             log.warning("Google Docs export too short (%d chars), ignoring", len(text))
             return None
+        _last_etag = resp.headers.get("ETag")
+        _last_modified = resp.headers.get("Last-Modified")
         log.info("Fetched rulebook from Google Docs: %d characters", len(text))
         return text
-    except (urllib.error.URLError, urllib.error.HTTPError, OSError, ValueError) as exc:
+    except (httpx.HTTPError, ValueError) as exc:
         log.warning("Failed to fetch rulebook from Google Docs: %s", exc)
         return None
 
 
-def _load_rulebook() -> str:
-    """Load rulebook: try Google Docs first, fall back to local file."""
-    global _rulebook_text
-    if not _rulebook_text:
-        text = _fetch_from_google_docs()
-        if text:
-            _rulebook_text = text
-        else:
-            log.info("Falling back to local rulebook.txt")
-            _rulebook_text = _RULEBOOK_PATH.read_text(encoding="utf-8")
-            log.info("Loaded rulebook from local file: %d characters", len(_rulebook_text))
-    return _rulebook_text
+def _set_rulebook(text: str) -> None:
+    """Swap in a new rulebook, rebuilding the system prompt and dropping stale answers."""
+    global _rulebook_text, _rulebook_generation
+    global _system_prompt_cache, _section_index
+    _rulebook_text = text
+    _rulebook_generation += 1
+    _system_prompt_cache = [
+        {"type": "text", "text": SYSTEM_PROMPT},
+        {
+            "type": "text",
+            "text": _PROMPT_PREFIX + text + _PROMPT_SUFFIX,
+            "cache_control": {"type": "ephemeral"},
+        },
+    ]
+    if len(text) > _FULLTEXT_MAX_CHARS:
+        _section_index = SectionIndex(split_sections(text, _SECTION_CHARS))
+        log.info("Rulebook split into %d sections for retrieval", len(_section_index.sections))
+    else:
+        _section_index = None
+    _answer_cache.clear()
+
+
+def _system_prompt_for(terms: Counter[str]) -> list[dict]:
+    """Full-rulebook prompt, or the top matching sections when the rulebook is too long."""
+    if _section_index is None:
+        return _system_prompt_cache
+    excerpts = "\n\n...\n\n".join(_section_index.top(terms, _TOP_SECTIONS))
+    return [
+        {"type": "text", "text": SYSTEM_PROMPT},
+        {"type": "text", "text": _EXCERPTS_PREFIX + excerpts + _PROMPT_SUFFIX},
+    ]
+
+
+def _load_local_rulebook() -> None:
+    """Load the bundled rulebook.txt so questions can be answered before Google Docs responds."""
+    _set_rulebook(_RULEBOOK_PATH.read_text(encoding="utf-8"))
+    log.info("Loaded rulebook from local file: %d characters", len(_rulebook_text))
 
 
 async def refresh_rulebook() -> None:
     """Re-fetch the rulebook from Google Docs and update the cache."""
-    global _rulebook_text
-    loop = asyncio.get_running_loop()
-    text = await loop.run_in_executor(None, _fetch_from_google_docs)
-    if text:
-        _rulebook_text = text
+    text = await _fetch_from_google_docs()
+    if text == _rulebook_text:
+        log.info("Rulebook unchanged, keeping cached prompt and answers")
+    elif text:
+        _set_rulebook(text)
         log.info("Rulebook refreshed: %d characters", len(_rulebook_text))
     else:
         log.warning("Rulebook refresh failed, keeping cached version")
 
 
-def _get_client() -> anthropic.Anthropic:
+def _get_client() -> anthropic.AsyncAnthropic:
     global _client
     if _client is None:
-        _client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        _client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
     return _client
 
 
-def _ask_sync(question: str) -> str:
-    rulebook = _load_rulebook()
-    client = _get_client()
-    response = client.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=1024,
-        system=SYSTEM_PROMPT.format(rulebook=rulebook),
-        messages=[{"role": "user", "content": question}],
-    )
-    return response.content[0].text
-
-
-async def ask_rulebook(question: str) -> str:
-    """Ask a question about the rulebook. Runs the sync Anthropic SDK in a thread."""
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, functools.partial(_ask_sync, question))
+async def close_clients() -> None:
+    """Close the Google Docs and Anthropic HTTP clients."""
+    await _http.aclose()
+    if _client is not None:
+        await _client.close()
+
+
+def _cached_answer(key: str, terms: Counter[str]) -> str | None:
+    """Return a cached answer for this exact question or a rephrasing of it."""
+    entry = _answer_cache.get(key)
+    if entry is not None:
+        log.info("Answer cache hit")
+        return entry[1]
+    for cached_terms, answer in _answer_cache.values():
+        if is_rephrasing(terms, cached_terms):
+            log.info("Answer cache rephrasing hit")
+            return answer
+    return None
+
+
+def _retrieve_exception(future: asyncio.Future[str]) -> None:
+    """Mark an in-flight failure as retrieved so it isn't logged again when nobody joined."""
+    future.exception()
+
+
+async def stream_rulebook(question: str, no_cache: bool = False) -> AsyncIterator[str]:
+    """Ask a question about the rulebook, yielding the answer text as Claude generates it.
+
+    Cached answers are yielded in one piece. Pass no_cache=True to bypass cached
+    answers and always query Claude.
+    """
+    key = normalize_question(question)
+    terms = question_terms(key)
+    if not no_cache:
+        answer = _cached_answer(key, terms)
+        if answer is not None:
+            yield answer
+            return
+        pending = _inflight.get(key)
+        if pending is not None:
+            log.info("Joining in-flight request for the same question")
+            yield await asyncio.shield(pending)
+            return
+
+    future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+    future.add_done_callback(_retrieve_exception)
+    _inflight.setdefault(key, future)
+    parts: list[str] = []
+    generation = _rulebook_generation
+    try:
+        async with _get_client().messages.stream(
+            model="claude-haiku-4-5-20251001",
+            max_tokens=1024,
+            system=_system_prompt_for(terms),
+            messages=[{"role": "user", "content": question}],
+        ) as stream:
+            async for text in stream.text_stream:
+                parts.append(text)
+                yield text
+            response = await stream.get_final_message()
+        usage = response.usage
+        log.info(
+            "Claude usage: input=%s cache_read=%s cache_write=%s output=%s",
+            usage.input_tokens,
+            usage.cache_read_input_tokens,
+            usage.cache_creation_input_tokens,
+            usage.output_tokens,
+        )
+        answer = "".join(parts)
+        if generation == _rulebook_generation:
+            _answer_cache[key] = (terms, answer)
+        future.set_result(answer)
+    except Exception as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+        if not future.done():
+            future.set_exception(RuntimeError("Request for this question was abandoned"))
+
+
+async def ask_rulebook(question: str, no_cache: bool = False) -> str:
+    """Ask a question about the rulebook and return the complete answer."""
+    return "".join([text async for text in stream_rulebook(question, no_cache)])
+
+
+_load_local_rulebook()
@@ -6,7 +6,8 @@ ANTHROPIC_API_KEY = os.environ["ANTHROPIC_API_KEY"]
 FAQ_CHANNEL_ID = int(os.environ["FAQ_CHANNEL_ID"]) if os.environ.get("FAQ_CHANNEL_ID") else None
 
 GOOGLE_DOC_ID = "1BdpkJnoliRMklsYWkoK21ul4vWI9dW2MttsVbWMRaV0"
-RULEBOOK_REFRESH_HOURS = 6
+RULEBOOK_REFRESH_HOURS = float(os.environ.get("RULEBOOK_REFRESH_HOURS") or 6)  # 0 disables refresh
+STATE_DB_PATH = os.environ.get("STATE_DB_PATH", "bot_state.db")
 
 logging.basicConfig(
     level=logging.INFO,
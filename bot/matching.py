@@ -0,0 +1,58 @@
+import re
+from collections import Counter
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Only words that never change what's being asked. Modals (can/should/will), connectives
+# (and/or/if) and tense (was/were) all stay as terms.
+_STOPWORDS = frozenset(
+    "a an the is are be been i we you my our your it its "
+    "of in on at to for from with about there this that these those get".split()
+)
+# Words folded into canonical terms, so spellings of the same question match. Negations all
+# become "not", and contractions split by the apostrophe ("can" + "t") fold to the same terms
+# as the written-out forms ("cannot", "cant").
+_FOLDS: dict[str, tuple[str, ...]] = {
+    "not": ("not",), "no": ("not",), "never": ("not",), "nor": ("not",), "t": ("not",),
+    "cannot": ("can", "not"), "cant": ("can", "not"),
+    "does": ("do",), "doesn": ("do",), "don": ("do",),
+    "dont": ("do", "not"), "doesnt": ("do", "not"),
+    "didn": ("did",), "didnt": ("did", "not"),
+    "isn": (), "isnt": ("not",), "aren": (), "arent": ("not",),
+    "wasn": ("was",), "wasnt": ("was", "not"), "weren": ("were",), "werent": ("were", "not"),
+    "shouldn": ("should",), "shouldnt": ("should", "not"),
+    "couldn": ("could",), "couldnt": ("could", "not"),
+    "wouldn": ("would",), "wouldnt": ("would", "not"),
+    "wont": ("will", "not"),
+}
+
+
+def normalize_question(question: str) -> str:
+    return _WHITESPACE_RE.sub(" ", question.strip().lower())
+
+
+def question_terms(key: str) -> Counter[str]:
+    """Bag of meaningful words in normalized text, with plurals, negations and contractions folded.
+
+    Interrogatives (what, when, where, ...) and modals are kept: "When is the draft?" and
+    "Where is the draft?" are different questions, as are "Can I ..." and "Should I ...".
+    """
+    terms: Counter[str] = Counter()
+    for word in _WORD_RE.findall(key):
+        if word in _STOPWORDS:
+            continue
+        if word in _FOLDS:
+            terms.update(_FOLDS[word])
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms[word] += 1
+    return terms
+
+
+def is_rephrasing(a: Counter[str], b: Counter[str]) -> bool:
+    """True if two questions use exactly the same meaningful words.
+
+    Deliberately strict: serving the wrong rulebook answer is worse than a cache miss.
+    """
+    return bool(a) and a.keys() == b.keys()
@@ -0,0 +1,77 @@
+import math
+import re
+from collections import Counter
+
+from bot.matching import question_terms
+
+_HEADING_RE = re.compile(r"^(?:\[Page [^\]\n]*\]|Section \d+\b.*)$", re.MULTILINE)
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def _cut(text: str, limit: int) -> list[str]:
+    """Cut text into pieces of at most limit characters, at newlines where possible."""
+    pieces: list[str] = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        pieces.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def split_sections(text: str, max_chars: int) -> list[str]:
+    """Split a rulebook on its section headings into sections of at most max_chars.
+
+    Long sections are packed by paragraph (and oversized paragraphs cut at line breaks).
+    Every piece keeps its heading, so excerpts can still be cited by section.
+    """
+    starts = [m.start() for m in _HEADING_RE.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    sections: list[str] = []
+    for begin, end in zip(starts, starts[1:] + [len(text)]):
+        block = text[begin:end].strip()
+        if len(block) <= max_chars:
+            if block:
+                sections.append(block)
+            continue
+        match = _HEADING_RE.match(block)
+        prefix = match.group() + "\n\n" if match else ""
+        body = block[match.end():].strip() if match else block
+        limit = max_chars - len(prefix)
+        buf: list[str] = []
+        size = len(prefix)  # len(prefix + "\n\n".join(buf)) + 2 while buf is non-empty
+        for paragraph in _PARAGRAPH_BREAK.split(body):
+            for piece in _cut(paragraph, limit):
+                if buf and size + len(piece) > max_chars:
+                    sections.append(prefix + "\n\n".join(buf))
+                    buf, size = [], len(prefix)
+                buf.append(piece)
+                size += len(piece) + 2
+        if buf:
+            sections.append(prefix + "\n\n".join(buf))
+    return sections
+
+
+class SectionIndex:
+    """IDF-weighted term index over rulebook sections, for picking the ones relevant to a question."""
+
+    def __init__(self, sections: list[str]) -> None:
+        self.sections = sections
+        self._terms = [question_terms(section.lower()) for section in sections]
+        df: Counter[str] = Counter()
+        for terms in self._terms:
+            df.update(terms.keys())
+        self._idf = {term: math.log(len(sections) / count) + 1 for term, count in df.items()}
+
+    def top(self, terms: Counter[str], k: int) -> list[str]:
+        """The k best-matching sections for a question's terms, in rulebook order."""
+        scores = [
+            sum(self._idf[term] * tf / (tf + 1) for term, tf in section.items() if term in terms)
+            for section in self._terms
+        ]
+        best = sorted(range(len(self.sections)), key=scores.__getitem__, reverse=True)[:k]
+        return [self.sections[i] for i in sorted(best)]
@@ -0,0 +1,63 @@
+import sqlite3
+from datetime import datetime, timezone
+
+from bot.config import STATE_DB_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v TEXT);
+CREATE TABLE IF NOT EXISTS questions (ts INTEGER, user TEXT, q TEXT);
+CREATE INDEX IF NOT EXISTS questions_ts ON questions (ts DESC);
+"""
+
+
+class BotState:
+    """Bot state that should survive restarts, stored in a small SQLite database."""
+
+    def __init__(self, max_questions: int, path: str = STATE_DB_PATH) -> None:
+        self._max_questions = max_questions
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL, and skips an fsync per question on the event loop.
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def get_faq_channel_id(self) -> int | None:
+        row = self._db.execute("SELECT v FROM kv WHERE k = 'faq_channel_id'").fetchone()
+        return int(row[0]) if row else None
+
+    def set_faq_channel_id(self, channel_id: int) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO kv (k, v) VALUES ('faq_channel_id', ?)",
+                (str(channel_id),),
+            )
+
+    def add_question(self, user: str, question: str, time: datetime) -> None:
+        """Append a question, dropping rows older than the newest max_questions."""
+        with self._db:
+            self._db.execute(
+                "INSERT INTO questions (ts, user, q) VALUES (?, ?, ?)",
+                (int(time.timestamp()), user, question),
+            )
+            self._db.execute(
+                "DELETE FROM questions WHERE rowid NOT IN ("
+                "SELECT rowid FROM questions ORDER BY ts DESC, rowid DESC LIMIT ?)",
+                (self._max_questions,),
+            )
+
+    def recent_questions(self, limit: int) -> list[dict]:
+        """Return the most recent questions, oldest first."""
+        rows = self._db.execute(
+            "SELECT ts, user, q FROM questions ORDER BY ts DESC, rowid DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [
+            {
+                "user": user,
+                "question": question,
+                "time": datetime.fromtimestamp(ts, timezone.utc),
+            }
+            for ts, user, question in reversed(rows)
+        ]
+
+    def close(self) -> None:
+        self._db.close()
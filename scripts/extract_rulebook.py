@@ -20,6 +20,7 @@ except ImportError:
 
 PDF_PATH = Path(__file__).parent.parent / "Assetts" / "Beer League Rulebook (v3.2).pdf"
 OUTPUT_PATH = Path(__file__).parent.parent / "bot" / "rulebook.txt"
+COLLAPSE_BLANKS = re.compile(r"\n{3,}")
 
 
 def extract() -> str:
@@ -30,7 +31,7 @@ def extract() -> str:
         text = page.get_text()
         # Clean up common PDF artifacts
         text = text.replace("\u200b", "")  # zero-width spaces
-        text = re.sub(r"\n{3,}", "\n\n", text)  # collapse excessive newlines
+        text = COLLAPSE_BLANKS.sub("\n\n", text)  # collapse excessive newlines
         text = text.strip()
         pages.append(f"[Page {i}]\n\n{text}")
 
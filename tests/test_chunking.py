@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+from collections.abc import AsyncIterator
+
+from bot.chunking import stream_chunks
+
+MAX = 1900
+EMPTY = "(empty)"
+
+
+async def _pieces(pieces: list[str]) -> AsyncIterator[str]:
+    for piece in pieces:
+        yield piece
+
+
+def _chunks(pieces: list[str]) -> list[str]:
+    async def collect() -> list[str]:
+        return [chunk async for chunk in stream_chunks(_pieces(pieces), MAX, EMPTY)]
+
+    return asyncio.run(collect())
+
+
+def _tokens(text: str, size: int = 37) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StreamChunksTests(unittest.TestCase):
+    def test_short_answer_is_one_chunk(self) -> None:
+        self.assertEqual(_chunks(["Hello", " there"]), ["Hello there"])
+
+    def test_separator_after_cut_is_kept(self) -> None:
+        chunks = _chunks(["x" * 1000 + "\n" + "y" * 899, "\n\n", "Next para"])
+        self.assertEqual(chunks, ["x" * 1000, "y" * 899 + "\n\nNext para"])
+
+    def test_cuts_at_last_newline_that_fits(self) -> None:
+        lines = [f"line {i} " + "z" * (i % 90) for i in range(300)]
+        chunks = _chunks(_tokens("\n".join(lines)))
+        self.assertTrue(all(len(chunk) <= MAX for chunk in chunks))
+        self.assertEqual("\n".join(chunks).split("\n"), lines)
+
+    def test_long_line_is_hard_cut(self) -> None:
+        self.assertEqual(_chunks(_tokens("y" * 5000)), ["y" * 1900, "y" * 1900, "y" * 1200])
+
+    def test_chunks_never_start_with_newlines(self) -> None:
+        chunks = _chunks(_tokens("a" * 1899 + "\n\n\n\n" + "b" * 10))
+        self.assertEqual(chunks, ["a" * 1899, "b" * 10])
+
+    def test_empty_or_blank_answer_yields_fallback(self) -> None:
+        self.assertEqual(_chunks([]), [EMPTY])
+        self.assertEqual(_chunks(["", "\n\n"]), [EMPTY])
+        self.assertEqual(_chunks(_tokens("\n" * 3000)), [EMPTY])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from bot.matching import is_rephrasing, normalize_question, question_terms
+
+
+def _same(a: str, b: str) -> bool:
+    return is_rephrasing(
+        question_terms(normalize_question(a)), question_terms(normalize_question(b))
+    )
+
+
+class IsRephrasingTests(unittest.TestCase):
+    def test_matches_rewordings(self) -> None:
+        self.assertTrue(_same("What is the salary cap?", "whats the salary cap"))
+        self.assertTrue(_same("How many subs can a team have", "how many subs can my team have?"))
+        self.assertTrue(_same("Can't I  reschedule?", "cannot i reschedule"))
+        self.assertTrue(_same("Don't teams get a bye?", "do not teams get a bye"))
+        self.assertTrue(_same("Does a sub count?", "does a sub count"))
+
+    def test_different_interrogatives_do_not_match(self) -> None:
+        self.assertFalse(_same("When is the draft?", "Where is the draft?"))
+        self.assertFalse(_same("How long are games?", "How many games are there?"))
+
+    def test_negation_does_not_match(self) -> None:
+        self.assertFalse(_same("What happens if a team is late?", "What happens if a team is not late?"))
+        self.assertFalse(_same("Can I sub mid-series?", "Can't I sub mid-series?"))
+
+    def test_different_modals_do_not_match(self) -> None:
+        self.assertFalse(_same("Can I sub in playoffs?", "Should I sub in playoffs?"))
+        self.assertFalse(_same("Can teams reschedule?", "Will teams reschedule?"))
+
+    def test_different_connectives_do_not_match(self) -> None:
+        self.assertFalse(_same("Is a forfeit a win or a loss?", "Is a forfeit a win and a loss?"))
+
+    def test_different_tense_does_not_match(self) -> None:
+        self.assertFalse(_same("What was the salary cap?", "What is the salary cap?"))
+
+    def test_different_subjects_do_not_match(self) -> None:
+        self.assertFalse(_same("Can I sub in playoffs?", "Can I sub in the regular season?"))
+        self.assertFalse(_same("What happens on a 2nd forfeit", "What happens on a 1st forfeit"))
+
+    def test_stopword_only_questions_never_match(self) -> None:
+        self.assertFalse(_same("is it?", "was it?"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from pathlib import Path
+
+from bot.matching import normalize_question, question_terms
+from bot.retrieval import SectionIndex, split_sections
+
+RULEBOOK = (Path(__file__).parent.parent / "bot" / "rulebook.txt").read_text(encoding="utf-8")
+
+
+class SplitSectionsTests(unittest.TestCase):
+    def test_splits_on_headings(self) -> None:
+        text = "Intro\n\n[Page 1 - Summary]\n\nOne\n\nSection 2: Rules\n\nTwo"
+        self.assertEqual(
+            split_sections(text, 1000),
+            ["Intro", "[Page 1 - Summary]\n\nOne", "Section 2: Rules\n\nTwo"],
+        )
+
+    def test_packs_long_sections_by_paragraph_under_their_heading(self) -> None:
+        heading = "[Page 3 - Roster]"
+        paragraphs = [f"{i}. " + "r" * 40 for i in range(10)]
+        sections = split_sections(heading + "\n\n" + "\n\n".join(paragraphs), 150)
+        self.assertGreater(len(sections), 1)
+        for section in sections:
+            self.assertTrue(section.startswith(heading + "\n\n"))
+            self.assertLessEqual(len(section), 150)
+        bodies = [section[len(heading) + 2:] for section in sections]
+        self.assertEqual("\n\n".join(bodies).split("\n\n"), paragraphs)
+
+    def test_cuts_oversized_paragraphs(self) -> None:
+        paragraph = "\n".join("line " + "p" * 30 for _ in range(20))
+        sections = split_sections("Section 1: Big\n\n" + paragraph, 200)
+        self.assertTrue(all(len(section) <= 200 for section in sections))
+        self.assertTrue(all(section.startswith("Section 1: Big\n\n") for section in sections))
+
+    def test_real_rulebook_respects_limit(self) -> None:
+        sections = split_sections(RULEBOOK * 5, 3000)
+        self.assertTrue(all(len(section) <= 3000 for section in sections))
+        self.assertTrue(all(section.startswith(("[Page", "Beer League Rulebook")) for section in sections))
+
+
+class SectionIndexTests(unittest.TestCase):
+    def test_top_sections_are_relevant_and_in_rulebook_order(self) -> None:
+        sections = [
+            "Section 1: Scheduling\n\nGames are played on weeknights.",
+            "Section 2: Subs\n\nA roster may have two rostered subs.",
+            "Section 3: Casting\n\nTeams must cast games.",
+            "Section 4: Subs in playoffs\n\nSubs in playoffs must be rostered subs.",
+        ]
+        index = SectionIndex(sections)
+        terms = question_terms(normalize_question("Can rostered subs play in playoffs?"))
+        self.assertEqual(index.top(terms, 2), [sections[1], sections[3]])
+
+    def test_top_on_real_rulebook_finds_roster_rules(self) -> None:
+        index = SectionIndex(split_sections(RULEBOOK, 3000))
+        terms = question_terms(normalize_question("How many rostered subs can a team have?"))
+        self.assertTrue(any("rostered sub" in section for section in index.top(terms, 5)))
+
+
+if __name__ == "__main__":
+    unittest.main()